@@ -1,32 +1,55 @@
 from flask import Flask, render_template, Response, jsonify, request
 import cv2
+import atexit
+import json
+import queue
 import threading
 import time
-from hand_detector import HandDetector
-from gesture_classifier import GestureClassifier
+from detection_worker import DetectionWorker
+from hand_drawing import draw_hand
+
+# libjpeg-turbo (PyTurboJPEG) is optional; fall back to OpenCV's encoder
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    jpeg = None
 
 app = Flask(__name__)
 
+# Latest letter snapshot shared with request handlers. Writers build a new
+# dict and swap the reference under lock; readers just read `state` (an
+# atomic reference read under the GIL) without locking. The version also
+# changes on notepad edits.
+state = {'letter': None, 'confidence': 0.0, 'version': 0}
+
 # Global variables for sharing data between threads
-current_letter = None
-letter_confidence = 0.0
-notepad_text = ""
-last_letter_time = 0
+notepad_chars = []  # Append-only notepad buffer, guarded by lock
+notepad_text = ""  # Cached join of notepad_chars, None after an edit
+last_letter_time = 0  # time.monotonic() of the last typed letter
 letter_cooldown = 1.0  # Seconds before same letter can be added again
 letter_hold_time = 0.5  # Seconds to hold gesture before adding letter
 letter_start_time = None
 pending_letter = None
+jpeg_quality = 80  # Default JPEG quality for the video stream
+
+# MJPEG multipart framing around each JPEG
+FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+FRAME_TRAILER = b'\r\n'
 
 # Thread lock for thread-safe operations
 lock = threading.Lock()
 
-# Initialize hand detector and classifier (supports 2 hands)
-detector = HandDetector(max_hands=2, detection_confidence=0.7, tracking_confidence=0.7)
-classifier = GestureClassifier()
+# Signals /events clients when a new state is published
+updates = threading.Condition(lock)
 
 # Camera capture
 camera = None
 
+# Hand detection/classification process (supports 2 hands)
+worker = None
+worker_lock = threading.Lock()  # Serializes starting/replacing the worker
+
 
 def get_camera():
     """Get or initialize camera."""
@@ -35,88 +58,247 @@ def get_camera():
         camera = cv2.VideoCapture(0)
         camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        # Keep only the newest frame in the driver queue to avoid lag
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     return camera
 
 
-def generate_frames():
-    """Generate video frames with hand detection overlay."""
-    global current_letter, letter_confidence, notepad_text
-    global last_letter_time, letter_start_time, pending_letter
+def get_worker():
+    """Get or start the detection worker process, replacing it if it died."""
+    global worker
+    with worker_lock:
+        if worker is not None and not worker.process.is_alive():
+            atexit.unregister(worker.close)
+            worker.close()
+            worker = None
+        if worker is None:
+            worker = DetectionWorker(max_hands=2, detection_confidence=0.7, tracking_confidence=0.7)
+            atexit.register(worker.close)
+        return worker
+
+
+def encode_jpeg(frame, quality=jpeg_quality):
+    """Encode a BGR frame as JPEG bytes, using libjpeg-turbo when available."""
+    if jpeg is not None:
+        return jpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR,
+                           jpeg_subsample=TJSAMP_420)
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    # tobytes() copy is needed: WSGI servers only accept immutable bytes
+    return buffer.tobytes()
+
+
+def get_notepad_text():
+    """Return the notepad as a string, joining only once after each edit."""
+    global notepad_text
+    text = notepad_text  # Atomic reference read; no lock while unchanged
+    if text is None:
+        with lock:
+            if notepad_text is None:
+                notepad_text = ''.join(notepad_chars)
+            text = notepad_text
+    return text
+
+
+def _publish(**changes):
+    """Swap in a new state snapshot and wake /events clients. Caller must hold lock."""
+    global state
+    state = {**state, **changes, 'version': state['version'] + 1}
+    updates.notify_all()
+
+
+def process_frame(frame):
+    """Detect hands, classify the letter and draw the overlay on a frame."""
+    global notepad_text, last_letter_time, letter_start_time, pending_letter
     
-    cam = get_camera()
+    # Detect hands and classify (two-hand classification if available)
+    # in the worker process, then draw landmarks here
+    letter, confidence, all_landmarks = get_worker().detect(frame)
+    for landmarks in all_landmarks:
+        draw_hand(frame, landmarks)
+    hand_count = len(all_landmarks)
     
-    while True:
-        success, frame = cam.read()
-        if not success:
-            break
-        
-        # Flip frame horizontally for mirror effect
-        frame = cv2.flip(frame, 1)
-        
-        # Detect hands and draw landmarks
-        frame, results = detector.find_hands(frame, draw=True)
-        
-        # Get landmarks for all detected hands
-        all_landmarks = detector.get_all_hands_landmarks(results, frame.shape)
-        hand_count = len(all_landmarks)
-        
-        # Show hand count on screen
-        cv2.putText(frame, f"Hands: {hand_count}", (frame.shape[1] - 120, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+    # Show hand count on screen
+    cv2.putText(frame, f"Hands: {hand_count}", (frame.shape[1] - 120, 30), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+    
+    if all_landmarks:
+        # Read the clock once per frame; monotonic so wall-clock changes
+        # can't stall or skip the hold/cooldown timers
+        current_time = time.monotonic()
         
-        if all_landmarks:
-            # Use two-hand classification if available
-            letter, confidence = classifier.classify_two_hands(all_landmarks)
+        # Letter stabilization logic. Shared by every stream so the cooldown
+        # stops two open tabs from typing the same held letter twice
+        with lock:
+            typed = None
+            if letter is not None:
+                if pending_letter == letter:
+                    # Same letter being held
+                    if letter_start_time and (current_time - letter_start_time) >= letter_hold_time:
+                        # Letter held long enough, add to notepad
+                        if (current_time - last_letter_time) >= letter_cooldown:
+                            typed = letter
+                            last_letter_time = current_time
+                            letter_start_time = None  # Reset for next letter
+                else:
+                    # New letter detected
+                    pending_letter = letter
+                    letter_start_time = current_time
+            hold_start_time = letter_start_time
             
-            with lock:
-                current_letter = letter
-                letter_confidence = confidence
-                
-                current_time = time.time()
-                
-                # Letter stabilization logic
-                if letter is not None:
-                    if pending_letter == letter:
-                        # Same letter being held
-                        if letter_start_time and (current_time - letter_start_time) >= letter_hold_time:
-                            # Letter held long enough, add to notepad
-                            if (current_time - last_letter_time) >= letter_cooldown:
-                                notepad_text += letter
-                                last_letter_time = current_time
-                                letter_start_time = None  # Reset for next letter
-                    else:
-                        # New letter detected
-                        pending_letter = letter
-                        letter_start_time = current_time
+            if typed:
+                notepad_chars.append(typed)
+                notepad_text = None
+            # Only wake /events clients when there is something new
+            if typed or (letter, confidence) != (state['letter'], state['confidence']):
+                _publish(letter=letter, confidence=confidence)
+        
+        # Draw current letter on frame
+        if letter:
+            cv2.putText(frame, f"Letter: {letter}", (10, 50), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+            cv2.putText(frame, f"Confidence: {confidence:.0%}", (10, 90), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
             
-            # Draw current letter on frame
-            if letter:
-                cv2.putText(frame, f"Letter: {letter}", (10, 50), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-                cv2.putText(frame, f"Confidence: {confidence:.0%}", (10, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                
-                # Draw hold progress bar
-                if letter_start_time:
-                    hold_progress = min(1.0, (time.time() - letter_start_time) / letter_hold_time)
-                    bar_width = int(200 * hold_progress)
-                    cv2.rectangle(frame, (10, 110), (210, 130), (100, 100, 100), -1)
-                    cv2.rectangle(frame, (10, 110), (10 + bar_width, 130), (0, 255, 0), -1)
-                    cv2.putText(frame, "Hold to type", (10, 155), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
-        else:
+            # Draw hold progress bar
+            if hold_start_time:
+                hold_progress = min(1.0, (current_time - hold_start_time) / letter_hold_time)
+                bar_width = int(200 * hold_progress)
+                cv2.rectangle(frame, (10, 110), (210, 130), (100, 100, 100), -1)
+                cv2.rectangle(frame, (10, 110), (10 + bar_width, 130), (0, 255, 0), -1)
+                cv2.putText(frame, "Hold to type", (10, 155), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+    else:
+        # Nothing to reset or publish on most empty frames, so skip the lock
+        if pending_letter is not None or state['letter'] is not None or state['confidence']:
             with lock:
-                current_letter = None
-                letter_confidence = 0.0
                 pending_letter = None
                 letter_start_time = None
-        
-        # Encode frame as JPEG
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                if state['letter'] is not None or state['confidence']:
+                    _publish(letter=None, confidence=0.0)
+    
+    return frame
+
+
+def _put(q, item, stop):
+    """Put item on a bounded queue, giving up once the stream is stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    """Get an item from a queue, returning None once the stream is stopped."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _end_stage(out_q, stop, failed):
+    """Signal the end of a stage's output; on failure stop the whole pipeline."""
+    if failed:
+        stop.set()
+    _put(out_q, None, stop)
+
+
+def read_frames(cam, read_q, stop):
+    """Reader stage: capture mirrored frames from the camera, dropping stale ones."""
+    failed = True
+    try:
+        while not stop.is_set():
+            # grab() waits for the next camera frame, pacing the loop to the camera FPS
+            if not cam.grab():
+                break
+            success, frame = cam.retrieve()
+            if not success:
+                break
+            # Detector is behind: replace the waiting frame with this newer one
+            try:
+                read_q.get_nowait()
+            except queue.Empty:
+                pass
+            # Flip frame horizontally for mirror effect
+            if not _put(read_q, cv2.flip(frame, 1), stop):
+                break
+        failed = False
+    finally:
+        _end_stage(read_q, stop, failed)
+
+
+def detect_frames(read_q, write_q, stop):
+    """Processor stage: hand frames to the detection worker one at a time."""
+    failed = True
+    try:
+        while True:
+            frame = _get(read_q, stop)
+            if frame is None:
+                break
+            if not _put(write_q, process_frame(frame), stop):
+                break
+        failed = False
+    finally:
+        _end_stage(write_q, stop, failed)
+
+
+def encode_frames(write_q, out_q, stop, quality):
+    """Writer stage: JPEG-encode annotated frames for the stream."""
+    failed = True
+    try:
+        while True:
+            frame = _get(write_q, stop)
+            if frame is None:
+                break
+            if not _put(out_q, encode_jpeg(frame, quality), stop):
+                break
+        failed = False
+    finally:
+        _end_stage(out_q, stop, failed)
+
+
+def generate_frames(quality=jpeg_quality):
+    """
+    Generate video frames with hand detection overlay.
+    
+    Capture, detection and encoding run on separate threads connected by
+    bounded queues, so camera I/O and JPEG encoding overlap with inference.
+    """
+    cam = get_camera()
+    
+    # The detector only ever sees the newest frame; later stages use
+    # maxsize=2 for back-pressure so stale frames don't pile up
+    read_q = queue.Queue(maxsize=1)
+    write_q = queue.Queue(maxsize=2)
+    out_q = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    
+    stages = [
+        threading.Thread(target=read_frames, args=(cam, read_q, stop), daemon=True),
+        threading.Thread(target=detect_frames, args=(read_q, write_q, stop), daemon=True),
+        threading.Thread(target=encode_frames, args=(write_q, out_q, stop, quality), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+    
+    try:
+        while True:
+            # Timed get: ends the response if a stage failed and stopped the pipeline
+            frame_bytes = _get(out_q, stop)
+            if frame_bytes is None:
+                break
+            
+            # Separate writes avoid copying each frame into a concatenated chunk
+            yield FRAME_HEADER
+            yield frame_bytes
+            yield FRAME_TRAILER
+    finally:
+        # Client disconnected or camera stopped; shut the stages down
+        stop.set()
 
 
 @app.route('/')
@@ -127,26 +309,39 @@ def index():
 
 @app.route('/video_feed')
 def video_feed():
-    """Video streaming route."""
-    return Response(generate_frames(),
+    """Video streaming route. Optional ?q= sets JPEG quality (1-100)."""
+    quality = request.args.get('q', default=jpeg_quality, type=int)
+    quality = max(1, min(100, quality))
+    return Response(generate_frames(quality),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
-@app.route('/get_letter')
-def get_letter():
-    """Get current detected letter."""
-    with lock:
-        return jsonify({
-            'letter': current_letter,
-            'confidence': letter_confidence
-        })
-
-
-@app.route('/get_notepad')
-def get_notepad():
-    """Get current notepad text."""
-    with lock:
-        return jsonify({'text': notepad_text})
+@app.route('/events')
+def events():
+    """Push current letter and notepad text to the browser as Server-Sent Events."""
+    def stream():
+        seen = -1
+        while True:
+            with updates:
+                updates.wait_for(lambda: state['version'] != seen, timeout=15)
+            
+            # Snapshots are never mutated, so no lock is needed to read one
+            snapshot = state
+            if snapshot['version'] == seen:
+                # Nothing changed for a while; keep the connection alive
+                yield ': keepalive\n\n'
+                continue
+            
+            seen = snapshot['version']
+            payload = json.dumps({
+                'letter': snapshot['letter'],
+                'confidence': snapshot['confidence'],
+                'text': get_notepad_text()
+            })
+            yield f'data: {payload}\n\n'
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
 
 
 @app.route('/clear_notepad', methods=['POST'])
@@ -154,7 +349,9 @@ def clear_notepad():
     """Clear notepad text."""
     global notepad_text
     with lock:
-        notepad_text = ""
+        notepad_chars.clear()
+        notepad_text = None
+        _publish()
     return jsonify({'success': True})
 
 
@@ -163,8 +360,11 @@ def backspace():
     """Remove last character from notepad."""
     global notepad_text
     with lock:
-        notepad_text = notepad_text[:-1]
-    return jsonify({'success': True, 'text': notepad_text})
+        if notepad_chars:
+            notepad_chars.pop()
+            notepad_text = None
+        _publish()
+    return jsonify({'success': True, 'text': get_notepad_text()})
 
 
 @app.route('/add_space', methods=['POST'])
@@ -172,8 +372,10 @@ def add_space():
     """Add space to notepad."""
     global notepad_text
     with lock:
-        notepad_text += " "
-    return jsonify({'success': True, 'text': notepad_text})
+        notepad_chars.append(" ")
+        notepad_text = None
+        _publish()
+    return jsonify({'success': True, 'text': get_notepad_text()})
 
 
 @app.route('/add_newline', methods=['POST'])
@@ -181,8 +383,10 @@ def add_newline():
     """Add newline to notepad."""
     global notepad_text
     with lock:
-        notepad_text += "\n"
-    return jsonify({'success': True, 'text': notepad_text})
+        notepad_chars.append("\n")
+        notepad_text = None
+        _publish()
+    return jsonify({'success': True, 'text': get_notepad_text()})
 
 
 if __name__ == '__main__':
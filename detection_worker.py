@@ -0,0 +1,141 @@
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _run(shm_name, requests, results, detector_args):
+    """
+    Worker process loop: detect and classify frames written to shared memory.
+    
+    Args:
+        shm_name: Name of the shared memory block holding the frame
+        requests: Queue of frame shapes to process (None to stop)
+        results: Queue receiving (letter, confidence, landmarks) per frame,
+            or the exception that stopped the worker
+        detector_args: Keyword arguments for HandDetector
+    """
+    # Imported here so MediaPipe is only loaded in the worker process
+    from hand_detector import HandDetector
+    from gesture_classifier import GestureClassifier
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    detector = None
+    try:
+        detector = HandDetector(**detector_args)
+        classifier = GestureClassifier()
+        
+        while True:
+            shape = requests.get()
+            if shape is None:
+                break
+            
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            _, hand_results = detector.find_hands(frame, draw=False)
+            all_landmarks = detector.get_all_hands_landmarks(hand_results, shape)
+            
+            if all_landmarks:
+                letter, confidence = classifier.classify_two_hands(all_landmarks)
+            else:
+                letter, confidence = None, 0.0
+            results.put((letter, confidence, all_landmarks))
+    except Exception as e:
+        # Hand the error to the caller waiting in detect()
+        results.put(e)
+    finally:
+        if detector is not None:
+            detector.release()
+        shm.close()
+
+
+class DetectionWorker:
+    """
+    Hand detection and classification in a persistent worker process.
+    
+    Frames are copied into shared memory so only the frame shape and the
+    small (letter, confidence, landmarks) result cross the process boundary.
+    This keeps MediaPipe off the GIL shared with the Flask threads.
+    """
+    
+    def __init__(self, max_frame_shape=(1080, 1920, 3), poll_interval=0.5, **detector_args):
+        """
+        Start the worker process.
+        
+        Args:
+            max_frame_shape: Largest (height, width, channels) frame to accept
+            poll_interval: Seconds between worker liveness checks while waiting
+            **detector_args: Keyword arguments for HandDetector
+        """
+        self.poll_interval = poll_interval
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(max_frame_shape)))
+        # Spawn rather than fork: the Flask process has OpenCV and request
+        # threads running, and forking a multithreaded process is unsafe
+        ctx = multiprocessing.get_context('spawn')
+        self.requests = ctx.Queue(maxsize=1)
+        self.results = ctx.Queue(maxsize=1)
+        self._lock = threading.Lock()  # One frame in flight at a time
+        
+        self.process = ctx.Process(
+            target=_run,
+            args=(self.shm.name, self.requests, self.results, detector_args),
+            daemon=True
+        )
+        self.process.start()
+    
+    def detect(self, frame):
+        """
+        Detect hands and classify the letter in a BGR frame.
+        
+        Args:
+            frame: uint8 BGR image from camera
+            
+        Returns:
+            tuple: (letter, confidence, landmarks) where landmarks is a list of
+                (21, 3) float32 pixel-coordinate arrays, one per hand
+                
+        Raises:
+            ValueError: If the frame does not fit in shared memory
+            RuntimeError: If the worker process has exited
+        """
+        if frame.nbytes > self.shm.size:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit in shared memory")
+        
+        with self._lock:
+            self._check_alive()
+            shared = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf)
+            shared[:] = frame
+            
+            # Poll so a worker that dies mid-frame cannot block us forever
+            while True:
+                try:
+                    self.requests.put(frame.shape, timeout=self.poll_interval)
+                    break
+                except queue.Full:
+                    self._check_alive()
+            while True:
+                try:
+                    result = self.results.get(timeout=self.poll_interval)
+                    break
+                except queue.Empty:
+                    self._check_alive()
+        
+        if isinstance(result, Exception):
+            raise RuntimeError("Detection worker failed") from result
+        return result
+    
+    def _check_alive(self):
+        """Raise RuntimeError if the worker process has exited."""
+        if not self.process.is_alive():
+            raise RuntimeError(
+                f"Detection worker exited with code {self.process.exitcode}"
+            )
+    
+    def close(self):
+        """Stop the worker process and free the shared memory."""
+        if self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=5)
+        self.shm.close()
+        self.shm.unlink()
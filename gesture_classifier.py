@@ -1,124 +1,233 @@
+import math
+
 import numpy as np
 
-class GestureClassifier:
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the kernel below runs as plain Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+# Finger-state bitmask flags (thumb is the most significant bit)
+THUMB, INDEX, MIDDLE, RING, PINKY = 16, 8, 4, 2, 1
+
+# How the kernel resolves each finger-state combination
+RULE_LETTER = 0  # Letter depends only on which fingers are extended
+RULE_POINT = 1   # Index only, thumb tucked: D or G by index direction
+RULE_TWO = 2     # Index and middle only: V/K/U/H by finger spread
+RULE_FOUR = 3    # Four fingers, thumb tucked: B, confidence by spread
+RULE_SHAPE = 4   # O/C/F distance checks, then the state's own letter
+
+# Fallback (letter_id, confidence) by number of extended fingers: A D V W B
+FALLBACK_LETTER = np.array([0, 3, 21, 22, 1], dtype=np.int64)
+FALLBACK_CONFIDENCE = 0.50
+
+
+def _build_state_table():
     """
-    Common-sense alphabet gesture classifier.
-    Recognizes letters based on how finger shapes visually resemble alphabet letters.
-    Supports both single-hand and two-hand gestures.
+    Precompute the finger-state part of the letter decision tree.
+    
+    Returns:
+        tuple: (rule, letter_id, confidence, down_letter_id) arrays indexed
+        by finger-state bitmask; down_letter_id is used when the index
+        finger points down (P/Q), letter_id -1 means use the fallback
     """
+    rule = np.full(32, RULE_LETTER, dtype=np.int64)
+    letter = np.full(32, -1, dtype=np.int64)
+    confidence = np.zeros(32, dtype=np.float64)
+    down_letter = np.full(32, -1, dtype=np.int64)
     
-    def __init__(self):
-        """Initialize the gesture classifier."""
-        self.letters = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        self.current_letter = None
-        self.confidence = 0.0
+    for bits in range(32):
+        thumb_up, index, middle, ring, pinky = (
+            bool(bits & flag) for flag in (THUMB, INDEX, MIDDLE, RING, PINKY)
+        )
+        extended = index + middle + ring + pinky
         
-        # Finger tip indices
-        self.finger_tips = {
-            'thumb': 4,
-            'index': 8,
-            'middle': 12,
-            'ring': 16,
-            'pinky': 20
-        }
-        
-        # Finger base (MCP) indices
-        self.finger_bases = {
-            'thumb': 2,
-            'index': 5,
-            'middle': 9,
-            'ring': 13,
-            'pinky': 17
-        }
-        
-    def _get_finger_state(self, landmarks):
-        """
-        Determine if each finger is extended or curled.
+        # === FIST SHAPES ===
+        # A - Fist (all fingers curled), S - fist with thumb over fingers
+        if extended == 0:
+            letter[bits], confidence[bits] = (18, 0.75) if thumb_up else (0, 0.80)
         
-        Returns:
-            dict: State of each finger (True=extended, False=curled)
-        """
-        if landmarks is None or len(landmarks) != 21:
-            return None
+        # === ONE FINGER ===
+        # I - Single pinky extended, Y - pinky + thumb
+        elif pinky and not index and not middle and not ring:
+            letter[bits], confidence[bits] = (24, 0.90) if thumb_up else (8, 0.85)
+        
+        # L - Thumb and index extended, otherwise D/G by direction
+        elif index and not middle and not ring and not pinky:
+            if thumb_up:
+                letter[bits], confidence[bits] = 11, 0.85
+            else:
+                rule[bits] = RULE_POINT
+        
+        # === TWO FINGERS ===
+        elif index and middle and not ring and not pinky:
+            rule[bits] = RULE_TWO
+        
+        # === THREE FINGERS ===
+        # W - Three fingers up (index, middle, ring)
+        elif index and middle and ring and not pinky:
+            letter[bits], confidence[bits] = 22, 0.85
+        
+        # === FOUR/FIVE FINGERS ===
+        elif extended == 4 and not thumb_up:
+            rule[bits] = RULE_FOUR
+        
+        # 5/Open - All fingers including thumb = B
+        elif extended == 4:
+            letter[bits], confidence[bits] = 1, 0.70
+        
+        # Everything else goes through the O/C/F shape checks first; this
+        # is the letter used when none of them match. (R, E, T, X and Z
+        # share finger states with earlier rules and are never reached.)
+        else:
+            rule[bits] = RULE_SHAPE
             
-        finger_states = {}
-        
-        # Thumb: Check x-distance
-        thumb_tip = landmarks[4]
-        thumb_ip = landmarks[3]
-        thumb_mcp = landmarks[2]
-        finger_states['thumb'] = abs(thumb_tip[0] - thumb_mcp[0]) > abs(thumb_ip[0] - thumb_mcp[0]) * 0.8
-        
-        # Other fingers: tip above PIP joint = extended
-        for finger, tip_idx in self.finger_tips.items():
-            if finger == 'thumb':
-                continue
-            tip = landmarks[tip_idx]
-            pip = landmarks[tip_idx - 2]  # PIP is 2 indices before tip
-            finger_states[finger] = tip[1] < pip[1]
-        
-        return finger_states
+            # N - Two fingers down over thumb
+            if not index and not middle:
+                letter[bits], confidence[bits] = 13, 0.65
+            # P - Index pointing down
+            elif index and middle:
+                down_letter[bits] = 15
+            # Q - Thumb and index pointing down together
+            elif index and thumb_up:
+                down_letter[bits] = 16
+            # J - Pinky doing hook motion (static: just pinky)
+            elif pinky and not index:
+                letter[bits], confidence[bits] = 9, 0.65
     
-    def _count_extended(self, finger_states):
-        """Count extended fingers (excluding thumb)."""
-        if not finger_states:
-            return 0
-        count = 0
-        for finger in ['index', 'middle', 'ring', 'pinky']:
-            if finger_states.get(finger, False):
-                count += 1
-        return count
+    return rule, letter, confidence, down_letter
+
+
+STATE_RULE, STATE_LETTER, STATE_CONFIDENCE, STATE_DOWN_LETTER = _build_state_table()
+
+
+@njit(cache=True)
+def _dist(L, p1, p2):
+    """2D distance between two landmarks."""
+    return np.sqrt((L[p1, 0] - L[p2, 0])**2 + (L[p1, 1] - L[p2, 1])**2)
+
+
+@njit(cache=True, fastmath=True)
+def _classify_kernel(L):
+    """
+    Compiled letter decision used by GestureClassifier.classify.
     
-    def _get_distances(self, landmarks):
-        """Calculate key distances between landmarks."""
-        if landmarks is None:
-            return None
-            
-        def dist(p1, p2):
-            return np.sqrt((landmarks[p1][0] - landmarks[p2][0])**2 + 
-                          (landmarks[p1][1] - landmarks[p2][1])**2)
+    The finger-state bitmask selects a precomputed rule; only the
+    distance and direction checks that rule needs are evaluated.
+    
+    Args:
+        L: float32 array of shape (21, 2) or (21, 3) with pixel x, y first
         
-        palm_size = dist(0, 9)
-        if palm_size == 0:
-            palm_size = 1
-            
-        return {
-            'thumb_index': dist(4, 8) / palm_size,
-            'thumb_middle': dist(4, 12) / palm_size,
-            'thumb_ring': dist(4, 16) / palm_size,
-            'thumb_pinky': dist(4, 20) / palm_size,
-            'index_middle': dist(8, 12) / palm_size,
-            'middle_ring': dist(12, 16) / palm_size,
-            'ring_pinky': dist(16, 20) / palm_size,
-            'palm_size': palm_size,
-            'index_pinky': dist(8, 20) / palm_size,
-        }
+    Returns:
+        tuple: (letter_id, confidence), letter_id is 0-25 for A-Z or -1 if none
+    """
+    # Finger states: thumb by x-distance, others by tip above PIP joint
+    thumb_up = abs(L[4, 0] - L[2, 0]) > abs(L[3, 0] - L[2, 0]) * 0.8
+    index = L[8, 1] < L[6, 1]
+    middle = L[12, 1] < L[10, 1]
+    ring = L[16, 1] < L[14, 1]
+    pinky = L[20, 1] < L[18, 1]
+    extended = int(index) + int(middle) + int(ring) + int(pinky)
+    bits = (int(thumb_up) * THUMB + int(index) * INDEX + int(middle) * MIDDLE
+            + int(ring) * RING + int(pinky) * PINKY)
+    
+    palm_size = _dist(L, 0, 9)
+    if palm_size == 0:
+        palm_size = 1.0
+    
+    # Index finger direction (tip relative to MCP)
+    dx = L[8, 0] - L[5, 0]
+    dy = L[8, 1] - L[5, 1]
+    index_vertical = abs(dx) <= abs(dy)
+    
+    rule = STATE_RULE[bits]
+    letter = -1
+    confidence = 0.75
+    
+    if rule == RULE_LETTER:
+        letter, confidence = STATE_LETTER[bits], STATE_CONFIDENCE[bits]
+    
+    elif rule == RULE_POINT:
+        if index_vertical and dy <= 0:
+            letter, confidence = 3, 0.80  # D - index pointing up
+        else:
+            letter, confidence = 6, 0.75  # G - pointing sideways
+    
+    elif rule == RULE_TWO:
+        index_middle = _dist(L, 8, 12) / palm_size
+        if index_middle > 0.5:
+            letter, confidence = 21, 0.90  # V - two fingers spread
+        elif index_middle < 0.3:
+            if thumb_up:
+                letter, confidence = 10, 0.75  # K - two fingers up with thumb
+            else:
+                letter, confidence = 20, 0.80  # U - two fingers together
+        else:
+            letter, confidence = 7, 0.70  # H - two fingers, medium spread
+    
+    elif rule == RULE_FOUR:
+        if _dist(L, 8, 20) / palm_size < 1.0:
+            letter, confidence = 1, 0.85  # B
+        else:
+            letter, confidence = 1, 0.70  # B
     
-    def _get_finger_direction(self, landmarks, finger):
-        """Get direction of a finger (up, down, left, right)."""
-        tip_idx = self.finger_tips[finger]
-        base_idx = self.finger_bases[finger]
+    else:
+        thumb_index = _dist(L, 4, 8) / palm_size
         
-        tip = landmarks[tip_idx]
-        base = landmarks[base_idx]
+        # === CIRCLE/CURVED SHAPES ===
+        # O - Fingers form circle (thumb touching index)
+        if thumb_index < 0.4 and extended <= 1:
+            letter, confidence = 14, 0.80  # O
+        
+        # C - Curved hand like holding something
+        elif thumb_index > 0.4 and thumb_index < 1.0:
+            if extended >= 2 and _dist(L, 4, 20) / palm_size < 1.5:
+                letter, confidence = 2, 0.75  # C
+        
+        # F - Thumb and index touching, other fingers up
+        elif middle and ring and pinky and thumb_index < 0.35:
+            letter, confidence = 5, 0.80  # F
         
-        dx = tip[0] - base[0]
-        dy = tip[1] - base[1]
+        # P/Q - Index pointing down
+        elif STATE_DOWN_LETTER[bits] >= 0:
+            if index_vertical and dy > 0:
+                letter, confidence = STATE_DOWN_LETTER[bits], 0.70
         
-        if abs(dx) > abs(dy):
-            return 'right' if dx > 0 else 'left'
         else:
-            return 'down' if dy > 0 else 'up'
+            letter, confidence = STATE_LETTER[bits], STATE_CONFIDENCE[bits]
+    
+    # === FALLBACK ===
+    if letter == -1:
+        letter, confidence = FALLBACK_LETTER[extended], FALLBACK_CONFIDENCE
+    
+    return letter, confidence
+
+
+class GestureClassifier:
+    """
+    Common-sense alphabet gesture classifier.
+    Recognizes letters based on how finger shapes visually resemble alphabet letters.
+    Supports both single-hand and two-hand gestures.
+    """
     
-    def _fingers_touching(self, landmarks, f1_idx, f2_idx, threshold=0.15):
-        """Check if two finger tips are close together."""
-        d = self._get_distances(landmarks)
-        if d is None:
-            return False
-        dist = np.sqrt((landmarks[f1_idx][0] - landmarks[f2_idx][0])**2 + 
-                       (landmarks[f1_idx][1] - landmarks[f2_idx][1])**2)
-        return dist / d['palm_size'] < threshold
+    # Tip and PIP joint indices of index, middle, ring and pinky fingers
+    TIP_IDX = np.array([8, 12, 16, 20], dtype=np.int32)
+    PIP_IDX = np.array([6, 10, 14, 18], dtype=np.int32)
     
+    def __init__(self):
+        """Initialize the gesture classifier."""
+        self.letters = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        self.current_letter = None
+        self.confidence = 0.0
+        
+        # Warm up the JIT so the first camera frame doesn't pay for compilation
+        _classify_kernel(np.zeros((21, 3), dtype=np.float32))
+        
     def classify(self, landmarks):
         """
         Classify hand gesture based on common-sense letter shapes.
@@ -136,200 +245,15 @@ class GestureClassifier:
         Returns:
             tuple: (letter, confidence) or (None, 0) if no detection
         """
-        if landmarks is None:
+        if landmarks is None or len(landmarks) != 21:
             return None, 0.0
         
-        finger_states = self._get_finger_state(landmarks)
-        if finger_states is None:
-            return None, 0.0
-            
-        d = self._get_distances(landmarks)
-        extended = self._count_extended(finger_states)
-        thumb_up = finger_states['thumb']
+        # Convert once; the compiled kernel reads x, y from this array
+        landmarks = np.ascontiguousarray(landmarks, dtype=np.float32)
         
-        letter = None
-        confidence = 0.75
-        
-        # ============ COMMON SENSE LETTER RECOGNITION ============
-        
-        # === FIST SHAPES ===
-        # A - Fist (all fingers curled)
-        if extended == 0 and not thumb_up:
-            letter = 'A'
-            confidence = 0.80
-        
-        # S - Fist with thumb over fingers
-        elif extended == 0 and thumb_up:
-            letter = 'S'
-            confidence = 0.75
-        
-        # === ONE FINGER ===
-        # I - Single pinky extended (looks like lowercase i)
-        elif (finger_states['pinky'] and not finger_states['index'] and 
-              not finger_states['middle'] and not finger_states['ring']):
-            if not thumb_up:
-                letter = 'I'
-                confidence = 0.85
-            else:
-                letter = 'Y'  # Pinky + thumb = Y
-                confidence = 0.90
-        
-        # D - Index finger pointing up (like number 1)
-        elif (finger_states['index'] and not finger_states['middle'] and 
-              not finger_states['ring'] and not finger_states['pinky']):
-            index_dir = self._get_finger_direction(landmarks, 'index')
-            if not thumb_up:
-                if index_dir == 'up':
-                    letter = 'D'
-                    confidence = 0.80
-                else:
-                    letter = 'G'  # Pointing sideways
-                    confidence = 0.75
-            else:
-                # L shape - thumb and index extended
-                letter = 'L'
-                confidence = 0.85
-        
-        # === TWO FINGERS ===
-        # V - Two fingers spread (peace sign looks like V)
-        elif (finger_states['index'] and finger_states['middle'] and 
-              not finger_states['ring'] and not finger_states['pinky']):
-            if d['index_middle'] > 0.5:
-                letter = 'V'
-                confidence = 0.90
-            elif d['index_middle'] < 0.3:
-                if thumb_up:
-                    letter = 'K'  # Two fingers up with thumb
-                    confidence = 0.75
-                else:
-                    letter = 'U'  # Two fingers together
-                    confidence = 0.80
-            else:
-                letter = 'H'  # Two fingers, medium spread
-                confidence = 0.70
-        
-        # R - Index and middle crossed (looks like R)
-        elif (finger_states['index'] and finger_states['middle'] and 
-              not finger_states['ring'] and not finger_states['pinky']):
-            if d['index_middle'] < 0.25:
-                letter = 'R'
-                confidence = 0.75
-        
-        # === THREE FINGERS ===
-        # W - Three fingers up (index, middle, ring - looks like W)
-        elif (finger_states['index'] and finger_states['middle'] and 
-              finger_states['ring'] and not finger_states['pinky']):
-            letter = 'W'
-            confidence = 0.85
-        
-        # === FOUR/FIVE FINGERS ===
-        # B - All four fingers extended, thumb tucked
-        elif (finger_states['index'] and finger_states['middle'] and 
-              finger_states['ring'] and finger_states['pinky'] and not thumb_up):
-            if d['index_pinky'] < 1.0:
-                letter = 'B'
-                confidence = 0.85
-            else:
-                letter = 'B'
-                confidence = 0.70
-        
-        # 5/Open - All fingers including thumb
-        elif extended == 4 and thumb_up:
-            letter = 'B'  # Open hand = B
-            confidence = 0.70
-        
-        # === CIRCLE/CURVED SHAPES ===
-        # O - Fingers form circle (thumb touching index)
-        elif d['thumb_index'] < 0.4 and extended <= 1:
-            letter = 'O'
-            confidence = 0.80
-        
-        # C - Curved hand like holding something
-        elif d['thumb_index'] > 0.4 and d['thumb_index'] < 1.0:
-            if extended >= 2 and d['thumb_pinky'] < 1.5:
-                letter = 'C'
-                confidence = 0.75
-        
-        # F - Thumb and index touching, other fingers up
-        elif (finger_states['middle'] and finger_states['ring'] and 
-              finger_states['pinky'] and d['thumb_index'] < 0.35):
-            letter = 'F'
-            confidence = 0.80
-        
-        # === SPECIAL SHAPES ===
-        # E - All fingers curled toward palm
-        elif extended == 0:
-            letter = 'E'
-            confidence = 0.70
-        
-        # M - Three fingers down over thumb
-        elif not finger_states['index'] and not finger_states['middle'] and not finger_states['ring']:
-            if not finger_states['pinky']:
-                letter = 'M'
-                confidence = 0.65
-        
-        # N - Two fingers down over thumb
-        elif not finger_states['index'] and not finger_states['middle']:
-            if finger_states['ring'] or finger_states['pinky']:
-                letter = 'N'
-                confidence = 0.65
-        
-        # T - Thumb between index and middle
-        elif not finger_states['index'] and not finger_states['middle']:
-            if d['thumb_index'] < 0.4 and d['thumb_middle'] < 0.5:
-                letter = 'T'
-                confidence = 0.65
-        
-        # X - Index finger bent/hooked
-        elif not finger_states['index'] and not finger_states['middle']:
-            index_tip = landmarks[8]
-            index_pip = landmarks[6]
-            if index_tip[1] > index_pip[1]:
-                letter = 'X'
-                confidence = 0.70
-        
-        # P - Index pointing down
-        elif finger_states['index'] and finger_states['middle']:
-            index_dir = self._get_finger_direction(landmarks, 'index')
-            if index_dir == 'down':
-                letter = 'P'
-                confidence = 0.70
-        
-        # Q - Thumb and index pointing down together
-        elif finger_states['index'] and thumb_up:
-            index_dir = self._get_finger_direction(landmarks, 'index')
-            if index_dir == 'down':
-                letter = 'Q'
-                confidence = 0.70
-        
-        # J - Pinky doing hook motion (static: just pinky)
-        elif finger_states['pinky'] and not finger_states['index']:
-            letter = 'J'
-            confidence = 0.65
-        
-        # Z - Index pointing (static version of Z motion)
-        elif (finger_states['index'] and not finger_states['middle'] and 
-              not finger_states['ring'] and not finger_states['pinky']):
-            letter = 'Z'
-            confidence = 0.60
-        
-        # === FALLBACK ===
-        if letter is None:
-            if extended == 0:
-                letter = 'A'
-                confidence = 0.50
-            elif extended == 1:
-                letter = 'D'
-                confidence = 0.50
-            elif extended == 2:
-                letter = 'V'
-                confidence = 0.50
-            elif extended == 3:
-                letter = 'W'
-                confidence = 0.50
-            elif extended == 4:
-                letter = 'B'
-                confidence = 0.50
+        letter_id, confidence = _classify_kernel(landmarks)
+        letter = self.letters[letter_id] if letter_id >= 0 else None
+        confidence = float(confidence)
         
         self.current_letter = letter
         self.confidence = confidence
@@ -357,14 +281,15 @@ class GestureClassifier:
         hand1 = landmarks_list[0]
         hand2 = landmarks_list[1]
         
-        fs1 = self._get_finger_state(hand1)
-        fs2 = self._get_finger_state(hand2)
-        
-        if fs1 is None or fs2 is None:
+        if len(hand1) != 21 or len(hand2) != 21:
             return self.classify(hand1)
         
-        ext1 = self._count_extended(fs1)
-        ext2 = self._count_extended(fs2)
+        # Finger states for both hands in one pass: tip above PIP = extended
+        H = np.stack([np.asarray(hand1, dtype=np.float32),
+                      np.asarray(hand2, dtype=np.float32)])  # (2, 21, 3)
+        extended = H[:, self.TIP_IDX, 1] < H[:, self.PIP_IDX, 1]  # (2, 4) index..pinky
+        ext1, ext2 = extended.sum(axis=1).tolist()
+        (index1, middle1), (index2, middle2) = extended[:, :2].tolist()
         
         # Two-hand letter recognition
         letter = None
@@ -381,12 +306,12 @@ class GestureClassifier:
             confidence = 0.70
         
         # Both hands with index fingers = could be forming letters
-        elif fs1['index'] and fs2['index'] and ext1 == 1 and ext2 == 1:
+        elif index1 and index2 and ext1 == 1 and ext2 == 1:
             # Two index fingers - could be making shapes
             # Check if they're touching or forming a shape
-            idx1 = hand1[8]
-            idx2 = hand2[8]
-            dist = np.sqrt((idx1[0] - idx2[0])**2 + (idx1[1] - idx2[1])**2)
+            idx1 = H[0, 8]
+            idx2 = H[1, 8]
+            dist = math.hypot(idx1[0] - idx2[0], idx1[1] - idx2[1])
             
             if dist < 50:  # Close together
                 letter = 'X'  # Crossed
@@ -397,7 +322,7 @@ class GestureClassifier:
         
         # V shape with both hands
         elif ext1 == 2 and ext2 == 2:
-            if (fs1['index'] and fs1['middle'] and fs2['index'] and fs2['middle']):
+            if index1 and middle1 and index2 and middle2:
                 letter = 'W'
                 confidence = 0.75
         
@@ -1,33 +1,110 @@
+import os
+import time
+
 import cv2
 import mediapipe as mp
 import numpy as np
 
+from hand_drawing import draw_hand
+
+# Hand landmarker model bundle for the MediaPipe Tasks API
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hand_landmarker.task')
+
+
 class HandDetector:
     """
     Hand detection and landmark extraction using MediaPipe.
     Detects up to 2 hands in camera frames and extracts 21 3D landmarks per hand.
     """
     
-    def __init__(self, max_hands=2, detection_confidence=0.7, tracking_confidence=0.7):
+    def __init__(self, max_hands=2, detection_confidence=0.7, tracking_confidence=0.7,
+                 model_path=DEFAULT_MODEL_PATH, use_gpu=True,
+                 inference_size=320):
         """
         Initialize the hand detector.
         
+        Uses the MediaPipe Tasks HandLandmarker (GPU delegate when available)
+        if the model bundle exists, otherwise the legacy CPU-only Hands solution.
+        
         Args:
             max_hands: Maximum number of hands to detect (default: 2)
             detection_confidence: Minimum detection confidence threshold
             tracking_confidence: Minimum tracking confidence threshold
+            model_path: Path to the hand_landmarker.task model bundle
+            use_gpu: Try the GPU delegate before falling back to CPU
+            inference_size: Longest side of the image passed to MediaPipe; larger
+                frames are downscaled (640x480 becomes 320x240), smaller
+                ones are used as is
         """
         self.mp_hands = mp.solutions.hands
-        self.mp_draw = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
-        
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=max_hands,
-            min_detection_confidence=detection_confidence,
-            min_tracking_confidence=tracking_confidence
-        )
-        
+        self.inference_size = inference_size
+        self._frame_shape = None
+        self._small_buf = None  # Downscaled BGR frame, None if no downscaling
+        self._rgb_buf = None
+        self._norm_buf = np.empty((21, 3), dtype=np.float32)
+        
+        self.use_tasks = os.path.exists(model_path)
+        self._timestamp_ms = -1
+        
+        if self.use_tasks:
+            self.hands = self._create_landmarker(
+                model_path, max_hands, detection_confidence, tracking_confidence, use_gpu
+            )
+        else:
+            self.hands = self.mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=max_hands,
+                min_detection_confidence=detection_confidence,
+                min_tracking_confidence=tracking_confidence
+            )
+    
+    def _create_landmarker(self, model_path, max_hands, detection_confidence,
+                           tracking_confidence, use_gpu):
+        """Create a Tasks HandLandmarker, falling back to CPU if the GPU delegate fails."""
+        from mediapipe.tasks import python as mp_py
+        from mediapipe.tasks.python import vision
+        
+        def create(delegate):
+            base = mp_py.BaseOptions(model_asset_path=model_path, delegate=delegate)
+            options = vision.HandLandmarkerOptions(
+                base_options=base,
+                running_mode=vision.RunningMode.VIDEO,
+                num_hands=max_hands,
+                min_hand_detection_confidence=detection_confidence,
+                min_tracking_confidence=tracking_confidence
+            )
+            return vision.HandLandmarker.create_from_options(options)
+        
+        if use_gpu:
+            try:
+                return create(mp_py.BaseOptions.Delegate.GPU)
+            except (RuntimeError, NotImplementedError):
+                pass  # No GPU/EGL support on this machine
+        return create(mp_py.BaseOptions.Delegate.CPU)
+    
+    def _allocate_buffers(self, frame_shape):
+        """Allocate the fixed-size resize and RGB buffers for a camera frame shape."""
+        h, w = frame_shape[:2]
+        scale = min(1.0, self.inference_size / max(h, w))
+        size = (max(1, round(h * scale)), max(1, round(w * scale)), 3)
+        
+        self._frame_shape = frame_shape
+        self._small_buf = np.empty(size, dtype=np.uint8) if scale < 1.0 else None
+        self._rgb_buf = np.empty(size, dtype=np.uint8)
+    
+    def _next_timestamp_ms(self):
+        """Monotonically increasing timestamp required by VIDEO running mode."""
+        self._timestamp_ms = max(int(time.monotonic() * 1000), self._timestamp_ms + 1)
+        return self._timestamp_ms
+    
+    def _hand_landmark_lists(self, results):
+        """Get the 21-landmark sequence of each detected hand from either API's results."""
+        if self.use_tasks:
+            return results.hand_landmarks
+        if not results.multi_hand_landmarks:
+            return []
+        return [hand_landmarks.landmark for hand_landmarks in results.multi_hand_landmarks]
+    
     def find_hands(self, frame, draw=True):
         """
         Detect hands in frame and optionally draw landmarks.
@@ -40,20 +117,37 @@ class HandDetector:
             frame: Frame with landmarks drawn (if draw=True)
             results: MediaPipe hand detection results
         """
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
-        
-        if results.multi_hand_landmarks and draw:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Draw connections
-                self.mp_draw.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    self.mp_drawing_styles.get_default_hand_connections_style()
-                )
+        h, w = frame.shape[:2]
+        
+        # No external cropping: in tracking mode MediaPipe already crops each
+        # frame to the previous landmarks' ROI and only reruns palm detection
+        # when tracking is lost. Its ROI is in full-frame coordinates, so the
+        # input must stay the whole frame.
+        if frame.shape != self._frame_shape:
+            self._allocate_buffers(frame.shape)
+        
+        # Downscale for inference; landmarks are normalized so the
+        # full-resolution frame is still used for display
+        region = frame
+        if self._small_buf is not None:
+            cv2.resize(frame, self._small_buf.shape[1::-1], dst=self._small_buf,
+                       interpolation=cv2.INTER_AREA)
+            region = self._small_buf
+        
+        # Convert BGR to RGB for MediaPipe into a reused buffer (MediaPipe
+        # needs a contiguous array, so a reversed channel view won't do)
+        cv2.cvtColor(region, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        rgb_frame = self._rgb_buf
+        
+        if self.use_tasks:
+            image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+            results = self.hands.detect_for_video(image, self._next_timestamp_ms())
+        else:
+            results = self.hands.process(rgb_frame)
+        
+        if draw:
+            for landmarks in self._hand_landmark_lists(results):
+                draw_hand(frame, [(lm.x * w, lm.y * h) for lm in landmarks])
         
         return frame, results
     
@@ -68,15 +162,16 @@ class HandDetector:
         Returns:
             landmarks: List of (x, y, z) tuples for 21 landmarks, or None if no hand
         """
-        if not results.multi_hand_landmarks:
+        hands = self._hand_landmark_lists(results)
+        if not hands:
             return None
         
         # Get first hand's landmarks
-        hand_landmarks = results.multi_hand_landmarks[0]
+        hand_landmarks = hands[0]
         h, w, _ = frame_shape
         
         landmarks = []
-        for lm in hand_landmarks.landmark:
+        for lm in hand_landmarks:
             # Convert to pixel coordinates
             x = lm.x * w
             y = lm.y * h
@@ -94,30 +189,31 @@ class HandDetector:
             frame_shape: Shape of the frame (height, width, channels)
             
         Returns:
-            list: List of landmark lists for each hand, or empty list if no hands
+            list: float32 array of shape (21, 3) with pixel x, y and relative z
+                for each hand, or empty list if no hands
         """
-        if not results.multi_hand_landmarks:
+        hands = self._hand_landmark_lists(results)
+        if not hands:
             return []
         
         h, w, _ = frame_shape
         all_hands = []
         
-        for hand_landmarks in results.multi_hand_landmarks:
-            landmarks = []
-            for lm in hand_landmarks.landmark:
-                x = lm.x * w
-                y = lm.y * h
-                z = lm.z
-                landmarks.append((x, y, z))
+        for hand_landmarks in hands:
+            landmarks = np.fromiter(
+                (v for lm in hand_landmarks for v in (lm.x, lm.y, lm.z)),
+                dtype=np.float32, count=63
+            ).reshape(21, 3)
+            # Convert to pixel coordinates, keep z as relative depth
+            landmarks[:, 0] *= w
+            landmarks[:, 1] *= h
             all_hands.append(landmarks)
         
         return all_hands
     
     def get_hand_count(self, results):
         """Get the number of detected hands."""
-        if not results.multi_hand_landmarks:
-            return 0
-        return len(results.multi_hand_landmarks)
+        return len(self._hand_landmark_lists(results))
     
     def get_normalized_landmarks(self, results):
         """
@@ -128,32 +224,29 @@ class HandDetector:
             results: MediaPipe hand detection results
             
         Returns:
-            normalized: Flattened array of normalized landmarks, or None
+            normalized: Flattened float32 array of normalized landmarks, or None.
+                The array is reused by the next call; copy it to keep it.
         """
-        if not results.multi_hand_landmarks:
+        hands = self._hand_landmark_lists(results)
+        if not hands:
             return None
         
-        hand_landmarks = results.multi_hand_landmarks[0]
-        
-        # Extract all landmark coordinates
-        landmarks = []
-        for lm in hand_landmarks.landmark:
-            landmarks.append([lm.x, lm.y, lm.z])
+        hand_landmarks = hands[0]
         
-        landmarks = np.array(landmarks)
+        # Extract all landmark coordinates into the preallocated buffer
+        landmarks = self._norm_buf
+        landmarks[:] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks]
         
         # Normalize relative to wrist (landmark 0)
-        wrist = landmarks[0]
-        landmarks = landmarks - wrist
+        landmarks -= landmarks[0]
         
         # Scale by hand size (distance from wrist to middle finger MCP)
-        middle_mcp = landmarks[9]
-        scale = np.linalg.norm(middle_mcp)
+        scale = np.linalg.norm(landmarks[9])
         if scale > 0:
-            landmarks = landmarks / scale
+            landmarks /= scale
         
-        # Flatten to 1D array
-        return landmarks.flatten()
+        # Flatten to 1D array (a view, no copy)
+        return landmarks.ravel()
     
     def release(self):
         """Release resources."""
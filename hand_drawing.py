@@ -0,0 +1,33 @@
+import cv2
+
+# Landmark index pairs joined when drawing a hand (same as MediaPipe's
+# HAND_CONNECTIONS), kept here so drawing does not import MediaPipe
+HAND_CONNECTIONS = (
+    # Palm
+    (0, 1), (0, 5), (0, 17), (5, 9), (9, 13), (13, 17),
+    # Thumb
+    (1, 2), (2, 3), (3, 4),
+    # Index finger
+    (5, 6), (6, 7), (7, 8),
+    # Middle finger
+    (9, 10), (10, 11), (11, 12),
+    # Ring finger
+    (13, 14), (14, 15), (15, 16),
+    # Pinky
+    (17, 18), (18, 19), (19, 20),
+)
+
+
+def draw_hand(frame, landmarks):
+    """
+    Draw hand connections and landmarks on a frame.
+    
+    Args:
+        frame: BGR image to draw on
+        landmarks: 21 pixel-coordinate (x, y[, z]) points of one hand
+    """
+    points = [(int(p[0]), int(p[1])) for p in landmarks]
+    for start, end in HAND_CONNECTIONS:
+        cv2.line(frame, points[start], points[end], (224, 224, 224), 2)
+    for point in points:
+        cv2.circle(frame, point, 4, (0, 0, 255), -1)
@@ -17,7 +17,7 @@ const btnClear = document.getElementById('btn-clear');
 
 // State
 let lastLetter = null;
-let updateInterval = null;
+let eventSource = null;
 
 /**
  * Update the detected letter display
@@ -48,36 +48,6 @@ function updateNotepadDisplay(text) {
     notepadTextEl.textContent = text || '';
 }
 
-/**
- * Fetch current letter from server
- */
-async function fetchLetter() {
-    try {
-        const response = await fetch('/get_letter');
-        const data = await response.json();
-        
-        if (data.letter !== lastLetter) {
-            updateLetterDisplay(data.letter, data.confidence);
-            lastLetter = data.letter;
-        }
-    } catch (error) {
-        console.error('Error fetching letter:', error);
-    }
-}
-
-/**
- * Fetch current notepad text from server
- */
-async function fetchNotepad() {
-    try {
-        const response = await fetch('/get_notepad');
-        const data = await response.json();
-        updateNotepadDisplay(data.text);
-    } catch (error) {
-        console.error('Error fetching notepad:', error);
-    }
-}
-
 /**
  * Clear notepad
  */
@@ -130,14 +100,25 @@ async function addNewline() {
 }
 
 /**
- * Start periodic updates
+ * Subscribe to letter and notepad updates pushed by the server
  */
 function startUpdates() {
-    // Update letter every 100ms
-    updateInterval = setInterval(() => {
-        fetchLetter();
-        fetchNotepad();
-    }, 100);
+    eventSource = new EventSource('/events');
+    
+    eventSource.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        
+        if (data.letter !== lastLetter) {
+            updateLetterDisplay(data.letter, data.confidence);
+            lastLetter = data.letter;
+        }
+        updateNotepadDisplay(data.text);
+    };
+    
+    // EventSource reconnects on its own after errors
+    eventSource.onerror = (error) => {
+        console.error('Error receiving updates:', error);
+    };
 }
 
 /**
@@ -170,7 +151,7 @@ function init() {
         }
     });
     
-    // Start polling for updates
+    // Start receiving updates
     startUpdates();
     
     console.log('Hand Sign Recognition App initialized');